@@ -179,8 +179,7 @@ def main(args=None):
 
     compile_code_if_necessary()
 
-    if not os.path.exists(run_dir):
-        os.mkdir(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
 
     print(f"There are {len(variants)} variants...")
 
@@ -20,8 +20,7 @@ class Configuration:
 
 this_dir = os.path.dirname(os.path.abspath(__file__))
 frequency_log_dir = os.path.join(this_dir, "frequency_log")
-if not os.path.exists(frequency_log_dir):
-    os.mkdir(frequency_log_dir)
+os.makedirs(frequency_log_dir, exist_ok=True)
 
 
 graph_builder = MicroBlossomGraphBuilder(
@@ -68,7 +67,7 @@ for configuration in configurations:
 
     def compute_next_maximum_frequency(frequency: int) -> int | None:
         project = get_project(configuration, frequency)
-        project.build()
+        project.build_for_timing()
         return project.next_maximum_frequency()
 
     explorer = FrequencyExplorer(
@@ -36,8 +36,7 @@ class Configuration:
 
 this_dir = os.path.dirname(os.path.abspath(__file__))
 frequency_log_dir = os.path.join(this_dir, "frequency_log")
-if not os.path.exists(frequency_log_dir):
-    os.mkdir(frequency_log_dir)
+os.makedirs(frequency_log_dir, exist_ok=True)
 
 
 graph_builder = MicroBlossomGraphBuilder(
@@ -74,11 +73,11 @@ def main() -> list[Configuration]:
     results = ["# <name> <best frequency/MHz>"]
     optimized_configurations = []
 
-    for configuration in configurations:
+    for configuration in shard_configurations(configurations):
 
         def compute_next_maximum_frequency(frequency: int) -> int | None:
             project = configuration.get_project(frequency)
-            project.build()
+            project.build_for_timing()
             return project.next_maximum_frequency()
 
         explorer = FrequencyExplorer(
@@ -95,11 +94,15 @@ def main() -> list[Configuration]:
         optimized.frequency = best_frequency
         optimized_configurations.append(optimized)
 
-    with open("best_frequencies.txt", "w", encoding="utf8") as f:
+    with open(shard_filepath("best_frequencies.txt"), "w", encoding="utf8") as f:
         f.write("\n".join(results))
 
     return optimized_configurations
 
 
 if __name__ == "__main__":
-    main()
+    # after all CI shards finish: `CI_SHARD_TOTAL=<total> python3 run.py merge_shards`
+    if sys.argv[1:] == ["merge_shards"]:
+        merge_shards("best_frequencies.txt", ci_shard()[1])
+    else:
+        main()
@@ -56,7 +56,7 @@ configurations = [Configuration(d=d) for d in d_vec]
 def main():
     results = ["# <name> <best frequency/MHz> <estimated frequency/MHz> <vertex num>"]
 
-    for configuration in configurations:
+    for configuration in shard_configurations(configurations):
 
         optimized = configuration.optimized_project()
         print(
@@ -69,9 +69,13 @@ def main():
             f"{configuration.name()} {optimized.clock_frequency} {optimized.estimate_maximum_frequency()} {graph.vertex_num}"
         )
 
-    with open("best_frequencies.txt", "w", encoding="utf8") as f:
+    with open(shard_filepath("best_frequencies.txt"), "w", encoding="utf8") as f:
         f.write("\n".join(results))
 
 
 if __name__ == "__main__":
-    main()
+    # after all CI shards finish: `CI_SHARD_TOTAL=<total> python3 run.py merge_shards`
+    if sys.argv[1:] == ["merge_shards"]:
+        merge_shards("best_frequencies.txt", ci_shard()[1])
+    else:
+        main()
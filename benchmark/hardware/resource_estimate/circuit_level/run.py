@@ -35,8 +35,7 @@ class Result:
 def calculate(d=3, p=0.001, max_half_weight=7, verbose: bool = True) -> Result:
     compile_code_if_necessary()
 
-    if not os.path.exists(tmp_dir):
-        os.mkdir(tmp_dir)
+    os.makedirs(tmp_dir, exist_ok=True)
 
     syndrome_file_path = os.path.join(tmp_dir, f"d_{d}.syndromes")
     if not os.path.exists(syndrome_file_path):
@@ -1,69 +1,96 @@
 import os
 import sys
 import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from run import *
 from build_micro_blossom import main as build_micro_blossom_main
-from get_ttyoutput import get_ttyoutput
+from build_micro_blossom import compile_scala_micro_blossom_if_necessary
+from get_ttyoutput import get_ttyoutput, assert_hello_world
+from log_multiplexer import LogMultiplexer
 from slurm_distribute import slurm_threads_or as STO
 from vivado_project import VivadoProject
 
+# each Vivado instance runs `launch_runs -jobs 3` plus helper threads, reserve this many cores for it
+N_VIVADO_THREADS = 8
+
+
+# split the available cores into `n` disjoint contiguous sets
+def split_cores(n: int) -> list[list[int]]:
+    if not hasattr(os, "sched_getaffinity"):
+        return [[] for _ in range(n)]
+    cores = sorted(os.sched_getaffinity(0))
+    bounds = [i * len(cores) // n for i in range(n + 1)]
+    return [cores[bounds[i] : bounds[i + 1]] for i in range(n)]
+
+
+# Vivado time grows roughly with the number of vertices, i.e. d^3 for circuit-level noise
+def estimate_synth_time(d: int) -> float:
+    return d**3
+
+
+# generate the graph and create the hardware project for a single code distance;
+# `threads` is the share of the cores of this worker, as the other workers run QEC-Playground concurrently
+def prepare_one(d: int, threads: int) -> int:
+    p = min(p_vec)  # use the minimum p to build the hardware
+    frequency = f_vec[d_vec.index(d)]
+    # first generate the graph config file
+    syndrome_file_path = os.path.join(hardware_dir, f"d_{d}.syndromes")
+    if not os.path.exists(syndrome_file_path):
+        command = fusion_blossom_qecp_generate_command(
+            d=d, p=p, total_rounds=10, noisy_measurements=d - 1
+        )
+        command += ["--code-type", "rotated-planar-code"]
+        command += ["--noise-model", "stim-noise-model"]
+        command += [
+            "--decoder",
+            "fusion",
+            "--decoder-config",
+            '{"only_stab_z":true,"use_combined_probability":true,"skip_decoding":true,"max_half_weight":7}',
+        ]
+        command += [
+            "--debug-print",
+            "fusion-blossom-syndrome-file",
+            "--fusion-blossom-syndrome-export-filename",
+            syndrome_file_path,
+        ]
+        command += ["--parallel", f"{threads}"]
+        print(command)
+        stdout, returncode = run_command_get_stdout(command)
+        print("\n" + stdout)
+        assert returncode == 0, "command fails..."
+
+    # then generate the graph json
+    graph_file_path = os.path.join(hardware_dir, f"d_{d}.json")
+    if not os.path.exists(graph_file_path):
+        command = micro_blossom_command() + ["parser"]
+        command += [syndrome_file_path]
+        command += ["--graph-file", graph_file_path]
+        print(command)
+        stdout, returncode = run_command_get_stdout(command)
+        print("\n" + stdout)
+        assert returncode == 0, "command fails..."
+
+    # create the hardware project
+    if not os.path.exists(hardware_proj_dir(d)):
+        parameters = ["--name", hardware_proj_name(d)]
+        parameters += ["--path", hardware_dir]
+        parameters += ["--clock-frequency", f"{frequency}"]
+        parameters += ["--graph", graph_file_path]
+        build_micro_blossom_main(parameters)
+
+    return d
+
 
 def main():
     compile_code_if_necessary()
+    # compile once here so that the workers do not run `sbt assembly` concurrently
+    compile_scala_micro_blossom_if_necessary()
 
-    if not os.path.exists(hardware_dir):
-        os.mkdir(hardware_dir)
+    os.makedirs(hardware_dir, exist_ok=True)
 
-    p = min(p_vec)  # use the minimum p to build the hardware
-    for idx, d in enumerate(d_vec):
-        frequency = f_vec[idx]
-        # first generate the graph config file
-        syndrome_file_path = os.path.join(hardware_dir, f"d_{d}.syndromes")
-        if not os.path.exists(syndrome_file_path):
-            command = fusion_blossom_qecp_generate_command(
-                d=d, p=p, total_rounds=10, noisy_measurements=d - 1
-            )
-            command += ["--code-type", "rotated-planar-code"]
-            command += ["--noise-model", "stim-noise-model"]
-            command += [
-                "--decoder",
-                "fusion",
-                "--decoder-config",
-                '{"only_stab_z":true,"use_combined_probability":true,"skip_decoding":true,"max_half_weight":7}',
-            ]
-            command += [
-                "--debug-print",
-                "fusion-blossom-syndrome-file",
-                "--fusion-blossom-syndrome-export-filename",
-                syndrome_file_path,
-            ]
-            command += ["--parallel", f"{STO(0)}"]  # use all cores
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
-            assert returncode == 0, "command fails..."
-
-        # then generate the graph json
-        graph_file_path = os.path.join(hardware_dir, f"d_{d}.json")
-        if not os.path.exists(graph_file_path):
-            command = micro_blossom_command() + ["parser"]
-            command += [syndrome_file_path]
-            command += ["--graph-file", graph_file_path]
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
-            assert returncode == 0, "command fails..."
-
-        # create the hardware project
-        if not os.path.exists(hardware_proj_dir(d)):
-            parameters = ["--name", hardware_proj_name(d)]
-            parameters += ["--path", hardware_dir]
-            parameters += ["--clock-frequency", f"{frequency}"]
-            parameters += ["--graph", graph_file_path]
-            build_micro_blossom_main(parameters)
-
-    # then build hello world application
+    # first build hello world application, which is shared by all hardware projects
     make_env = os.environ.copy()
     make_env["EMBEDDED_BLOSSOM_MAIN"] = "hello_world"
     process = subprocess.Popen(
@@ -77,23 +104,53 @@ def main():
     process.wait()
     assert process.returncode == 0, "compile error"
 
-    # build all hardware projects using the hello world application
-    for d in d_vec:
-        log_file_path = os.path.join(hardware_proj_dir(d), "build.log")
-        print(f"building d={d}, log output to {log_file_path}")
+    # prepare the hardware projects of different d in parallel;
+    # dispatch the longest jobs first (LPT scheduling) so that no long job starts last
+    schedule = sorted(d_vec, key=estimate_synth_time, reverse=True)
+    max_workers = max(1, min(len(d_vec), STO(os.cpu_count()) // N_VIVADO_THREADS))
+    threads = max(1, STO(len(os.sched_getaffinity(0))) // max_workers)
+    # fork, so that the workers inherit the compilation flags above instead of compiling again
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = [executor.submit(prepare_one, d, threads) for d in schedule]
+        for future in as_completed(futures):
+            print(f"d={future.result()} is prepared")
+
+    # build all hardware projects using the hello world application, at most `max_workers` at a time;
+    # a single thread forwards the outputs of all builds to their log files
+    free_core_sets = split_cores(max_workers)
+    process_core_sets = {}
+    pending = [
+        d
+        for d in schedule
         if not os.path.exists(
             os.path.join(hardware_proj_dir(d), f"{hardware_proj_name(d)}.xsa")
-        ):
-            with open(log_file_path, "a") as log:
-                process = subprocess.Popen(
-                    ["make"],
-                    universal_newlines=True,
-                    stdout=log.fileno(),
-                    stderr=log.fileno(),
-                    cwd=hardware_proj_dir(d),
+        )
+    ]
+    multiplexer = LogMultiplexer()
+    # a failed build stops the others instead of leaving them running
+    try:
+        while len(pending) > 0 or multiplexer.running() > 0:
+            while len(pending) > 0 and multiplexer.running() < max_workers:
+                d = pending.pop(0)
+                log_file_path = os.path.join(hardware_proj_dir(d), "build.log")
+                print(f"building d={d}, log output to {log_file_path}")
+                # pin each build (and the Vivado it spawns) to its own cores to avoid thrashing;
+                # pinned from the start by `taskset`, since make may fork Vivado before the parent could pin it
+                cores = free_core_sets.pop()
+                command = ["make"]
+                if len(cores) > 0:
+                    command = ["taskset", "-c", ",".join(map(str, cores))] + command
+                process = multiplexer.spawn(
+                    command, log_file_path, cwd=hardware_proj_dir(d)
                 )
-                process.wait()
+                process_core_sets[process.pid] = cores
+            for process in multiplexer.poll():
+                free_core_sets.append(process_core_sets.pop(process.pid))
                 assert process.returncode == 0, "synthesis error"
+    finally:
+        multiplexer.terminate_all()
 
     # check timing reports to make sure there are no negative slacks
     sanity_check_failed = False
@@ -134,7 +191,7 @@ def main():
             log.write(tty_output + "\n")
             log.write(f"[host_event] [command_output]\n")
             log.write(command_output + "\n")
-            assert "Hello world!" in tty_output
+            assert_hello_world(tty_output)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import os
 from run import *
+from get_ttyoutput import assert_hello_world
 import traceback
 
 
@@ -20,7 +21,7 @@ def main(config: Configuration):
                 os.path.join(project.hardware_proj_dir(), f"hello.log"), "w"
             ) as log:
                 log.write(tty_output)
-                assert "Hello world!" in tty_output
+                assert_hello_world(tty_output)
         else:
             print("skip hello world test because hardware is not connected")
 
@@ -76,8 +76,7 @@ class HardwareTest(TestVariant):
 def main():
     compile_code_if_necessary()
 
-    if not os.path.exists(run_dir):
-        os.mkdir(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
 
     filtered_variants = [
         variant
@@ -1,13 +1,21 @@
 import os
 import sys
+import asyncio
 import subprocess
 from datetime import datetime
 from run import *
 from build_micro_blossom import main as build_micro_blossom_main
-from get_ttyoutput import get_ttyoutput
+from build_micro_blossom import compile_scala_micro_blossom_if_necessary
+from get_ttyoutput import get_ttyoutput, assert_hello_world
 from slurm_distribute import slurm_threads_or as STO
 from vivado_project import VivadoProject
 
+# each Vivado instance takes 8~16GB memory, bound the number of concurrent syntheses by the host memory
+VIVADO_MEMORY = 16 * 1024**3
+N_CONCURRENT_VIVADO = max(
+    1, os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // VIVADO_MEMORY
+)
+
 
 def inject_registers(injections: int):
     return [
@@ -18,96 +26,129 @@ def inject_registers(injections: int):
     ][injections]
 
 
-def main():
-    compile_code_if_necessary()
-
-    if not os.path.exists(hardware_dir):
-        os.mkdir(hardware_dir)
-
-    for idx, d in enumerate(d_vec):
-        frequency = f_vec[idx]
-        # first generate the graph config file
-        syndrome_file_path = os.path.join(hardware_dir, f"d_{d}.syndromes")
-        if not os.path.exists(syndrome_file_path):
-            command = fusion_blossom_qecp_generate_command(
-                d=d, p=p, total_rounds=10, noisy_measurements=d - 1
-            )
-            command += ["--code-type", "rotated-planar-code"]
-            command += ["--noise-model", "stim-noise-model"]
-            command += [
-                "--decoder",
-                "fusion",
-                "--decoder-config",
-                '{"only_stab_z":true,"use_combined_probability":true,"skip_decoding":true,"max_half_weight":7}',
-            ]
-            command += [
-                "--debug-print",
-                "fusion-blossom-syndrome-file",
-                "--fusion-blossom-syndrome-export-filename",
-                syndrome_file_path,
-            ]
-            command += ["--parallel", f"{STO(0)}"]  # use all cores
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
-            assert returncode == 0, "command fails..."
-
-        # then generate the graph json
-        graph_file_path = os.path.join(hardware_dir, f"d_{d}.json")
-        if not os.path.exists(graph_file_path):
-            command = micro_blossom_command() + ["parser"]
-            command += [syndrome_file_path]
-            command += ["--graph-file", graph_file_path]
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
-            assert returncode == 0, "command fails..."
-
-        for inj in range(max_injections):
-            # create the hardware project
-            if not os.path.exists(hardware_proj_dir(d, inj)):
-                parameters = ["--name", hardware_proj_name(d, inj)]
-                parameters += ["--path", hardware_dir]
-                parameters += ["--clock-frequency", f"{frequency}"]
-                parameters += ["--graph", graph_file_path]
-                parameters += ["--inject-registers"] + inject_registers(inj)
-                parameters += ["--support-offloading"]
-                build_micro_blossom_main(parameters)
-
-    # then build hello world application
+async def build_hello_world():
     make_env = os.environ.copy()
     make_env["EMBEDDED_BLOSSOM_MAIN"] = "hello_world"
-    process = subprocess.Popen(
-        ["make", "Xilinx"],
-        universal_newlines=True,
+    process = await asyncio.create_subprocess_exec(
+        "make",
+        "Xilinx",
         stdout=sys.stdout,
         stderr=sys.stderr,
         cwd=embedded_dir,
         env=make_env,
     )
-    process.wait()
+    await process.wait()
     assert process.returncode == 0, "compile error"
 
-    # build all hardware projects using the hello world application
-    for d in d_vec:
-        for inj in range(max_injections):
-            log_file_path = os.path.join(hardware_proj_dir(d, inj), "build.log")
-            print(f"building d={d}, inj={inj}, log output to {log_file_path}")
-            if not os.path.exists(
-                os.path.join(
-                    hardware_proj_dir(d, inj), f"{hardware_proj_name(d, inj)}.xsa"
-                )
-            ):
-                with open(log_file_path, "a") as log:
-                    process = subprocess.Popen(
-                        ["make"],
-                        universal_newlines=True,
-                        stdout=log.fileno(),
-                        stderr=log.fileno(),
-                        cwd=hardware_proj_dir(d, inj),
-                    )
-                    process.wait()
-                    assert process.returncode == 0, "synthesis error"
+
+# all the pipelines generate their syndromes concurrently, each QEC-Playground run takes its share of the cores
+def qecp_threads() -> int:
+    return max(1, STO(len(os.sched_getaffinity(0))) // len(d_vec))
+
+
+async def gen_syndrome(d: int) -> str:
+    syndrome_file_path = os.path.join(hardware_dir, f"d_{d}.syndromes")
+    if not os.path.exists(syndrome_file_path):
+        command = fusion_blossom_qecp_generate_command(
+            d=d, p=p, total_rounds=10, noisy_measurements=d - 1
+        )
+        command += ["--code-type", "rotated-planar-code"]
+        command += ["--noise-model", "stim-noise-model"]
+        command += [
+            "--decoder",
+            "fusion",
+            "--decoder-config",
+            '{"only_stab_z":true,"use_combined_probability":true,"skip_decoding":true,"max_half_weight":7}',
+        ]
+        command += [
+            "--debug-print",
+            "fusion-blossom-syndrome-file",
+            "--fusion-blossom-syndrome-export-filename",
+            syndrome_file_path,
+        ]
+        command += ["--parallel", f"{qecp_threads()}"]
+        print(command)
+        _, returncode = await run_command_stream_async(command)
+        assert returncode == 0, "command fails..."
+    return syndrome_file_path
+
+
+async def gen_graph(d: int, syndrome_file_path: str) -> str:
+    graph_file_path = os.path.join(hardware_dir, f"d_{d}.json")
+    if not os.path.exists(graph_file_path):
+        command = micro_blossom_command() + ["parser"]
+        command += [syndrome_file_path]
+        command += ["--graph-file", graph_file_path]
+        print(command)
+        _, returncode = await run_command_stream_async(command)
+        assert returncode == 0, "command fails..."
+    return graph_file_path
+
+
+async def create_proj(
+    d: int, inj: int, graph_file_path: str, vivado_semaphore: asyncio.Semaphore
+):
+    if not os.path.exists(hardware_proj_dir(d, inj)):
+        parameters = ["--name", hardware_proj_name(d, inj)]
+        parameters += ["--path", hardware_dir]
+        parameters += ["--clock-frequency", f"{f_vec[d_vec.index(d)]}"]
+        parameters += ["--graph", graph_file_path]
+        parameters += ["--inject-registers"] + inject_registers(inj)
+        parameters += ["--support-offloading"]
+        # the generator is a blocking Python function (and a memory hungry JVM), run it aside the event loop
+        async with vivado_semaphore:
+            await asyncio.to_thread(build_micro_blossom_main, parameters)
+
+
+async def make_synth(d: int, inj: int, vivado_semaphore: asyncio.Semaphore):
+    log_file_path = os.path.join(hardware_proj_dir(d, inj), "build.log")
+    if os.path.exists(
+        os.path.join(hardware_proj_dir(d, inj), f"{hardware_proj_name(d, inj)}.xsa")
+    ):
+        return
+    async with vivado_semaphore:
+        print(f"building d={d}, inj={inj}, log output to {log_file_path}")
+        with open(log_file_path, "a") as log:
+            process = await asyncio.create_subprocess_exec(
+                "make",
+                stdout=log.fileno(),
+                stderr=log.fileno(),
+                cwd=hardware_proj_dir(d, inj),
+            )
+            await process.wait()
+            assert process.returncode == 0, "synthesis error"
+
+
+# build all hardware projects of a single d using the hello world application
+async def pipeline(
+    d: int, hello_world: asyncio.Task, vivado_semaphore: asyncio.Semaphore
+):
+    syndrome_file_path = await gen_syndrome(d)
+    graph_file_path = await gen_graph(d, syndrome_file_path)
+
+    async def build_injection(inj: int):
+        await create_proj(d, inj, graph_file_path, vivado_semaphore)
+        await hello_world
+        await make_synth(d, inj, vivado_semaphore)
+
+    await asyncio.gather(*[build_injection(inj) for inj in range(max_injections)])
+
+
+async def build_all():
+    vivado_semaphore = asyncio.Semaphore(N_CONCURRENT_VIVADO)
+    # the hello world application is compiled while the graphs are being generated
+    hello_world = asyncio.create_task(build_hello_world())
+    await asyncio.gather(*[pipeline(d, hello_world, vivado_semaphore) for d in d_vec])
+
+
+def main():
+    compile_code_if_necessary()
+    # compile once here so that the concurrent project generations do not run `sbt assembly` together
+    compile_scala_micro_blossom_if_necessary()
+
+    os.makedirs(hardware_dir, exist_ok=True)
+
+    asyncio.run(build_all())
 
     # check timing reports to make sure there are no negative slacks
     sanity_check_failed = False
@@ -154,7 +195,7 @@ def main():
                 log.write(tty_output + "\n")
                 log.write(f"[host_event] [command_output]\n")
                 log.write(command_output + "\n")
-                assert "Hello world!" in tty_output
+                assert_hello_world(tty_output)
 
 
 if __name__ == "__main__":
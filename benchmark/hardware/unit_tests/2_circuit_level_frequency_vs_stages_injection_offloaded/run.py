@@ -41,8 +41,7 @@ def hardware_proj_dir(d: int, inj: int):
 def main():
     compile_code_if_necessary()
 
-    if not os.path.exists(run_dir):
-        os.mkdir(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
 
     test_syndrome_count = 100
     for idx, d in enumerate(d_vec):
@@ -36,8 +36,7 @@ def main():
     global d
     compile_code_if_necessary()
 
-    if not os.path.exists(run_dir):
-        os.mkdir(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
 
     test_syndrome_count = 100
     syndrome_file_path = os.path.join(run_dir, f"run.syndromes")
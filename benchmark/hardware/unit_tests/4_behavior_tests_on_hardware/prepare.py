@@ -4,7 +4,7 @@ import subprocess
 from datetime import datetime
 from run import *
 from build_micro_blossom import main as build_micro_blossom_main
-from get_ttyoutput import get_ttyoutput
+from get_ttyoutput import get_ttyoutput, assert_hello_world
 from slurm_distribute import slurm_threads_or as STO
 from vivado_project import VivadoProject
 
@@ -13,8 +13,7 @@ def main():
     global frequency
     compile_code_if_necessary()
 
-    if not os.path.exists(hardware_dir):
-        os.mkdir(hardware_dir)
+    os.makedirs(hardware_dir, exist_ok=True)
 
     # generate names and expanded configurations
     states = []
@@ -147,7 +146,7 @@ def main():
             log.write(tty_output + "\n")
             log.write(f"[host_event] [command_output]\n")
             log.write(command_output + "\n")
-            assert "Hello world!" in tty_output
+            assert_hello_world(tty_output)
 
 
 if __name__ == "__main__":
@@ -3,15 +3,27 @@ import subprocess
 import os
 import sys
 import tempfile
+import threading
+import asyncio
+import collections
+import shutil
 import math
+import mmap
 import scipy
+import numpy as np
 import git
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
 from typing import Optional
 
 
-git_root_dir = git.Repo(".", search_parent_directories=True).working_tree_dir
+# the one place that resolves the repository root; cached in the environment, so that child processes skip
+# the repository discovery
+git_root_dir = (
+    os.environ.get("MICRO_BLOSSOM_GIT_ROOT")
+    or git.Repo(".", search_parent_directories=True).working_tree_dir
+)
+os.environ["MICRO_BLOSSOM_GIT_ROOT"] = git_root_dir
 rust_dir = os.path.join(git_root_dir, "src", "cpu", "blossom")
 embedded_dir = os.path.join(git_root_dir, "src", "cpu", "embedded")
 benchmark_dir = os.path.join(git_root_dir, "benchmark")
@@ -243,6 +255,31 @@ def micro_blossom_benchmark_command(
     return command
 
 
+def slurm_threads_or(default_threads):
+    """
+    the same thread count as `slurm_distribute.slurm_threads_or`, without importing that module (which needs
+    hjson and exits on SLURM_HELP); keep SLURM_DISTRIBUTE_CPUS_PER_TASK in sync with it
+    """
+    if os.environ.get("SLURM_DISTRIBUTE_ENABLED", "") != "":
+        return 36
+    if os.environ.get("SLURM_USE_EXISTING_DATA", "") != "":
+        return 36
+    if os.environ.get("STO_THREAD_LIMIT", "") != "":
+        return int(os.environ["STO_THREAD_LIMIT"])
+    return default_threads
+
+
+def spawnable_command(command):
+    """
+    CPython launches a command with posix_spawn instead of fork+exec only when its executable is a path and
+    `close_fds=False`; forking is slow once this process holds many large graphs
+    """
+    executable = command[0]
+    if os.path.dirname(executable) == "":
+        executable = shutil.which(executable) or executable
+    return [executable] + list(command[1:])
+
+
 def run_command_get_stdout(
     command, no_stdout=False, use_tmp_out=False, stderr_to_stdout=False
 ):
@@ -255,14 +292,17 @@ def run_command_get_stdout(
         out_filename = out_file.name
         stdout = out_file
     if no_stdout:
-        stdout = sys.stdout
+        stdout = None  # inherit sys.stdout
+    # inheriting stdio (None instead of sys.stdout/sys.stderr) and keeping fds (all non-inheritable
+    # anyway) lets CPython launch with posix_spawn instead of forking a possibly huge process
     process = subprocess.Popen(
-        command,
+        spawnable_command(command),
         universal_newlines=True,
         env=env,
         stdout=stdout,
-        stderr=(stdout if stderr_to_stdout else sys.stderr),
+        stderr=(subprocess.STDOUT if stderr_to_stdout else None),
         bufsize=100000000,
+        close_fds=False,
     )
     stdout, _ = process.communicate()
     if use_tmp_out:
@@ -274,6 +314,60 @@ def run_command_get_stdout(
     return stdout, process.returncode
 
 
+def run_command_stream(command, tail_lines=2000):
+    """
+    forward the output of the command to sys.stdout as it is produced, instead of collecting it all in memory;
+    only the last `tail_lines` lines are kept and returned as the stdout, e.g., for error context
+    """
+    compile_code_if_necessary()
+    env = os.environ.copy()
+    env["RUST_BACKTRACE"] = "full"
+    process = subprocess.Popen(
+        spawnable_command(command),
+        universal_newlines=True,
+        env=env,
+        stdout=subprocess.PIPE,
+        bufsize=1,
+        close_fds=False,
+    )
+    tail = collections.deque(maxlen=tail_lines)
+
+    def forward():
+        for line in process.stdout:
+            sys.stdout.write(line)
+            tail.append(line)
+        sys.stdout.flush()
+
+    reader = threading.Thread(target=forward, daemon=True)
+    reader.start()
+    process.wait()
+    reader.join()
+    process.stdout.close()
+    return "".join(tail), process.returncode
+
+
+async def run_command_stream_async(command, tail_lines=2000):
+    """the same as `run_command_stream`, but can run concurrently with other commands in the event loop"""
+    compile_code_if_necessary()
+    env = os.environ.copy()
+    env["RUST_BACKTRACE"] = "full"
+    process = await asyncio.create_subprocess_exec(
+        *spawnable_command(command),
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        limit=1 << 24,  # allow long lines
+        close_fds=False,
+    )
+    tail = collections.deque(maxlen=tail_lines)
+    async for line in process.stdout:
+        line = line.decode("utf8", errors="replace")
+        sys.stdout.write(line)
+        tail.append(line)
+    sys.stdout.flush()
+    await process.wait()
+    return "".join(tail), process.returncode
+
+
 class GnuplotData:
     def __init__(self, filename):
         assert isinstance(filename, str)
@@ -425,6 +519,14 @@ class ParityReporters:
     reporters: list[list[int]]
 
 
+BINARY_GRAPH_MAGIC = b"MBGRAPH1"
+BINARY_GRAPH_TREES = [
+    "vertex_binary_tree",
+    "edge_binary_tree",
+    "vertex_edge_binary_tree",
+]
+
+
 @dataclass_json
 @dataclass
 class SingleGraph:
@@ -443,10 +545,134 @@ class SingleGraph:
     @staticmethod
     def from_file(filename):
         assert isinstance(filename, str)
+        binary_filename = SingleGraph.binary_file_path(filename)
+        if os.path.exists(binary_filename) and os.path.getmtime(
+            binary_filename
+        ) >= os.path.getmtime(filename):
+            return SingleGraph.from_binary_file(binary_filename)
         with open(filename, "r", encoding="utf8") as f:
             value = f.read()
         return SingleGraph.schema().loads(value)
 
+    # the binary (SoA) copy of a graph json file, e.g. `d_3.json` -> `d_3.bin`
+    @staticmethod
+    def binary_file_path(filename: str) -> str:
+        return os.path.splitext(filename)[0] + ".bin"
+
+    def save_binary(self, filename: str):
+        """
+        Store the large per-vertex and per-edge fields as packed arrays (weights and growth in int16),
+        and the remaining small fields in a json header; see `from_binary_file`
+        """
+        weights = [edge.w for edge in self.weighted_edges]
+        assert all(
+            -(2**15) <= value < 2**15 for value in weights + self.vertex_max_growth
+        )
+        arrays = {
+            "positions": np.array(
+                [[p.i, p.j, p.t] for p in self.positions], dtype=np.float64
+            ).reshape(-1, 3),
+            "edges": np.array(
+                [[e.l, e.r] for e in self.weighted_edges], dtype=np.int32
+            ).reshape(-1, 2),
+            "weights": np.array(weights, dtype=np.int16),
+            "virtual_vertices": np.array(self.virtual_vertices, dtype=np.int32),
+            "vertex_max_growth": np.array(self.vertex_max_growth, dtype=np.int16),
+        }
+        for tree in BINARY_GRAPH_TREES:
+            arrays[tree] = np.array(
+                [
+                    [-1 if value is None else value for value in (n.p, n.l, n.r)]
+                    for n in getattr(self, tree).nodes
+                ],
+                dtype=np.int32,
+            ).reshape(-1, 3)
+        header = {
+            "vertex_num": self.vertex_num,
+            "arrays": {},
+            "offloading": Offloading.schema().dump(self.offloading, many=True),
+            "layer_fusion": (
+                None if self.layer_fusion is None else self.layer_fusion.to_dict()
+            ),
+            "parity_reporters": (
+                None
+                if self.parity_reporters is None
+                else self.parity_reporters.to_dict()
+            ),
+        }
+        offset = 0
+        for name, array in arrays.items():
+            header["arrays"][name] = [array.dtype.str, list(array.shape), offset]
+            offset += (array.nbytes + 7) // 8 * 8
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf8")
+        data_start = (16 + len(header_bytes) + 7) // 8 * 8
+        with open(filename, "wb") as f:
+            f.write(BINARY_GRAPH_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header["arrays"][name][2])
+                f.write(array.tobytes())
+
+    @staticmethod
+    def from_binary_file(filename: str) -> "SingleGraph":
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                assert buffer[:8] == BINARY_GRAPH_MAGIC, f"{filename} is not a graph"
+                header_length = int.from_bytes(buffer[8:16], "little")
+                header = json.loads(buffer[16 : 16 + header_length])
+                data_start = (16 + header_length + 7) // 8 * 8
+
+                def read(name: str) -> list:
+                    dtype, shape, offset = header["arrays"][name]
+                    if math.prod(shape) == 0:
+                        return []
+                    array = np.frombuffer(
+                        buffer,
+                        dtype=dtype,
+                        count=math.prod(shape),
+                        offset=data_start + offset,
+                    )
+                    return array.reshape(shape).tolist()
+
+                positions = [Position(i, j, t) for i, j, t in read("positions")]
+                weighted_edges = [
+                    WeightedEdge(l, r, w)
+                    for (l, r), w in zip(read("edges"), read("weights"))
+                ]
+                virtual_vertices = read("virtual_vertices")
+                vertex_max_growth = read("vertex_max_growth")
+                trees = {
+                    tree: BinaryTree(
+                        [
+                            BinaryTreeNode(
+                                *[None if value == -1 else value for value in node]
+                            )
+                            for node in read(tree)
+                        ]
+                    )
+                    for tree in BINARY_GRAPH_TREES
+                }
+        layer_fusion = header["layer_fusion"]
+        parity_reporters = header["parity_reporters"]
+        return SingleGraph(
+            positions=positions,
+            vertex_num=header["vertex_num"],
+            weighted_edges=weighted_edges,
+            virtual_vertices=virtual_vertices,
+            offloading=Offloading.schema().load(header["offloading"], many=True),
+            layer_fusion=(
+                None if layer_fusion is None else LayerFusion.from_dict(layer_fusion)
+            ),
+            parity_reporters=(
+                None
+                if parity_reporters is None
+                else ParityReporters.from_dict(parity_reporters)
+            ),
+            vertex_max_growth=vertex_max_growth,
+            **trees,
+        )
+
     def effective_offloader_num(
         self, support_offloading: bool, support_layer_fusion: bool
     ) -> int:
@@ -12,8 +12,7 @@ target_path = os.path.join(script_dir, f"{name}_verilog")
 
 assert os.path.exists(os.path.join(project_path, "build.sbt")), "wrong project path"
 
-if not os.path.exists(target_path):
-    os.makedirs(target_path)
+os.makedirs(target_path, exist_ok=True)
 
 # call sbt to generate the verilog at `target_path`
 subprocess.Popen(f'sbt "runMain microblossom.Axi4TimerDirect {target_path}"', shell=True, cwd=project_path).wait()
@@ -89,23 +89,44 @@ set_property offset 0x400000000 [get_bd_addr_segs versal_cips_0/M_AXI_FPD/SEG_${
 regenerate_bd_layout
 save_bd_design
 
+# each IP is synthesized out-of-context (OOC) by default; set MB_GLOBAL_SYNTH to synthesize the block design
+# together with the top level instead, because writing and reading the per-IP checkpoints dominates the
+# synthesis time of small designs (the Python builder sets it below `OOC_MIN_DISTANCE`)
+if { [info exists ::env(MB_GLOBAL_SYNTH)] } {
+  set_property synth_checkpoint_mode None [get_files ${name}.bd]
+}
+
 # get_nets -hier -filter { NAME =~ "vmk180_micro_blossom_i/MicroBlossom_0/inst/dual/broadcastRegInserted_valid" }
 
 # do not use more jobs because they cause segmentation fault
 # https://www.reddit.com/r/FPGA/comments/1846nds/i_am_suffering_from_segfault_with_vivado_on_arm/
 # https://support.xilinx.com/s/question/0D54U00008NnuzVSAR/vivado-20222-fails-with-segmentation-fault-during-synthesis?language=en_US
 
+# the number of jobs can be overwritten by the VIVADO_JOBS environment variable
+set jobs 3
+if { [info exists ::env(VIVADO_JOBS)] } {
+  set jobs $::env(VIVADO_JOBS)
+}
+
 # run synthesis, implementation and write bitstream
 set_property strategy Flow_AlternateRoutability [get_runs synth_1]
-launch_runs synth_1 -jobs 3
+# reuse the synthesized netlist of the same RTL (e.g. built at another clock frequency)
+if { [info exists ::env(MB_REUSE_SYNTH)] } {
+  set_property INCREMENTAL_CHECKPOINT $::env(MB_REUSE_SYNTH) [get_runs synth_1]
+}
+launch_runs synth_1 -jobs $jobs
 wait_on_run synth_1
 
 set_property strategy Congestion_SpreadLogic_high [get_runs impl_1]
 set_property STEPS.PHYS_OPT_DESIGN.ARGS.DIRECTIVE AggressiveFanoutOpt [get_runs impl_1]
-launch_runs impl_1 -jobs 3
+# reuse the routed checkpoint of an identical design built before, see MB_VIVADO_CACHE in vivado_builder.py
+if { [info exists ::env(MB_INCREMENTAL_CHECKPOINT)] } {
+  set_property INCREMENTAL_CHECKPOINT $::env(MB_INCREMENTAL_CHECKPOINT) [get_runs impl_1]
+}
+launch_runs impl_1 -jobs $jobs
 wait_on_run impl_1
 
-launch_runs impl_1 -to_step write_device_image -jobs 3
+launch_runs impl_1 -to_step write_device_image -jobs $jobs
 wait_on_run impl_1
 
 # export hardware XSA file
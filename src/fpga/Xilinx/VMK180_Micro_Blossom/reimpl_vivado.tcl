@@ -7,17 +7,23 @@ open_project ./${name}_vivado/${name}.xpr
 reset_run synth_1
 reset_run impl_1
 
+# the number of jobs can be overwritten by the VIVADO_JOBS environment variable
+set jobs 4
+if { [info exists ::env(VIVADO_JOBS)] } {
+  set jobs $::env(VIVADO_JOBS)
+}
+
 # run synthesis, implementation and write bitstream
 set_property strategy Flow_AlternateRoutability [get_runs synth_1]
-launch_runs synth_1 -jobs 4
+launch_runs synth_1 -jobs $jobs
 wait_on_run synth_1
 
 set_property strategy Congestion_SpreadLogic_high [get_runs impl_1]
 set_property STEPS.PHYS_OPT_DESIGN.ARGS.DIRECTIVE AggressiveFanoutOpt [get_runs impl_1]
-launch_runs impl_1 -jobs 4
+launch_runs impl_1 -jobs $jobs
 wait_on_run impl_1
 
-launch_runs impl_1 -to_step write_device_image -jobs 4
+launch_runs impl_1 -to_step write_device_image -jobs $jobs
 wait_on_run impl_1
 
 # export hardware XSA file
@@ -50,8 +50,7 @@ def main(args=None):
             f"folder {project_dir} already exists, please use `--overwrite` option to overwrite the existing files"
         )
         exit(1)
-    if not os.path.exists(project_dir):
-        os.makedirs(project_dir)
+    os.makedirs(project_dir, exist_ok=True)
 
     print("Copying the project files")
     # common.py
@@ -102,8 +101,7 @@ def main(args=None):
     with open(os.path.join(project_dir, "run_xsdb.tcl"), "w", encoding="utf8") as f:
         f.write(run_xsdb_tcl)
     # src/*.c
-    if not os.path.exists(os.path.join(project_dir, "src")):
-        os.makedirs(os.path.join(project_dir, "src"))
+    os.makedirs(os.path.join(project_dir, "src"), exist_ok=True)
     shutil.copy2(
         os.path.join(template_dir, "src", "main.c"),
         os.path.join(project_dir, "src", "main.c"),
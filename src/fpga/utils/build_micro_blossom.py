@@ -5,10 +5,12 @@ import sys
 import os
 import re
 import shutil
-import git
 from dataclasses import dataclass
 
-git_root_dir = git.Repo(".", search_parent_directories=True).working_tree_dir
+utils_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(utils_dir, "..", "..", "..", "benchmark"))
+from micro_util import git_root_dir
+
 template_dir = os.path.join(
     git_root_dir, "src", "fpga", "Xilinx", "VMK180_Micro_Blossom"
 )
@@ -66,16 +68,14 @@ class MicroBlossomProjectBuilder:
 
     def project_dir(self) -> str:
         project_dir = os.path.join(self.path, self.name)
-        if not os.path.exists(project_dir):
-            os.makedirs(project_dir)
+        os.makedirs(project_dir, exist_ok=True)
         return project_dir
 
     def generate_verilog(self):
         verilog_path = os.path.abspath(
             os.path.join(self.project_dir(), f"{self.name}_verilog")
         )
-        if not os.path.exists(verilog_path):
-            os.makedirs(verilog_path)
+        os.makedirs(verilog_path, exist_ok=True)
         parameters = self.parameters + [
             "--output-dir",
             verilog_path,
@@ -184,8 +184,7 @@ class MicroBlossomProjectBuilder:
                 f.write(run_xsdb_tcl)
 
     def copy_c_source(self, update: bool = False):
-        if not os.path.exists(os.path.join(self.project_dir(), "src")):
-            os.makedirs(os.path.join(self.project_dir(), "src"))
+        os.makedirs(os.path.join(self.project_dir(), "src"), exist_ok=True)
         if (
             not os.path.exists(os.path.join(self.project_dir(), "src", "main.c"))
             or update
@@ -2,7 +2,7 @@ from typing import Callable, Optional
 from datetime import datetime
 import math, os
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
 from vivado_builder import *
@@ -30,6 +30,47 @@ def get_log_best_value(log_filepath: str, keyword: str) -> Optional[int]:
     return None
 
 
+def ci_shard() -> tuple[int, int]:
+    """the (index, total) of this CI shard, given by CI_SHARD_INDEX and CI_SHARD_TOTAL"""
+    shard = int(os.environ.get("CI_SHARD_INDEX", 0))
+    total = int(os.environ.get("CI_SHARD_TOTAL", 1))
+    assert 0 <= shard < total, f"invalid shard {shard} of {total}"
+    return shard, total
+
+
+def shard_configurations(configurations: list) -> list:
+    shard, total = ci_shard()
+    return [c for i, c in enumerate(configurations) if i % total == shard]
+
+
+# each shard writes to its own file, e.g. best_frequencies.1.txt, when the sweep is sharded
+def shard_filepath(filepath: str) -> str:
+    shard, total = ci_shard()
+    if total == 1:
+        return filepath
+    base, ext = os.path.splitext(filepath)
+    return f"{base}.{shard}{ext}"
+
+
+def merge_shards(filepath: str, total: int) -> None:
+    """merge the per-shard result files back in the order of the original configurations"""
+    header = None
+    shard_rows = []
+    for shard in range(total):
+        base, ext = os.path.splitext(filepath)
+        with open(f"{base}.{shard}{ext}", "r", encoding="utf8") as f:
+            lines = f.read().split("\n")
+        header = lines[0]
+        shard_rows.append(lines[1:])
+    results = [header]
+    for index in range(max(len(rows) for rows in shard_rows)):
+        for rows in shard_rows:
+            if index < len(rows):
+                results.append(rows[index])
+    with open(filepath, "w", encoding="utf8") as f:
+        f.write("\n".join(results))
+
+
 def log_to_file(log_filepath: str, message: str) -> None:
     time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{time}] {message}"
@@ -50,7 +91,10 @@ class FrequencyExplorer:
     max_frequency: int = 300
     max_iteration: int = 5
     extra_decrease: float = 0.1  # set 90% of the next frequency
+    fitted_decrease: float = 0.02  # set 98% if fitted from multiple trials
     on_failure_decrease: float = 0.3  # set 70% of the frequency if synthesis failed
+    # (tried frequency, suggested frequency) of the trials that failed timing
+    history: list[tuple[int, int]] = field(default_factory=list)
 
     def get_log_best_frequency(self) -> Optional[int]:
         return get_log_best_value(self.log_filepath, BEST_FREQUENCY_KEYWORD)
@@ -58,6 +102,22 @@ class FrequencyExplorer:
     def log(self, message):
         log_to_file(self.log_filepath, message)
 
+    # the slack is only locally linear to the clock period: Vivado works harder on tighter constraints;
+    # with multiple failed trials, fit `wns = a * period + b` and solve for `wns = 0` instead of assuming `a = 1`
+    def next_frequency(self, frequency: int, new_frequency: int) -> int:
+        self.history.append((frequency, new_frequency))
+        periods = [1e3 / tried for tried, _ in self.history]  # in ns
+        if len(set(periods)) >= 2:
+            slacks = [
+                1e3 / tried - 1e3 / suggested for tried, suggested in self.history
+            ]
+            a, b = np.polyfit(periods, slacks, 1)
+            if a > 0 and -b / a > 0:
+                fitted_frequency = 1e3 / (-b / a)
+                self.log(f"fitted achievable frequency is {fitted_frequency}MHz")
+                return math.floor((1 - self.fitted_decrease) * fitted_frequency)
+        return math.floor((1 - self.extra_decrease) * new_frequency)
+
     # return the maximum frequency that can be achieved; None if cannot finish within iterations
     def optimize(self) -> Optional[int]:
         log_best_frequency = self.get_log_best_frequency()
@@ -68,7 +128,7 @@ class FrequencyExplorer:
             if new_frequency is None:
                 return log_best_frequency
             # start from this frequency
-            self.max_frequency = math.floor((1 - self.extra_decrease) * new_frequency)
+            self.max_frequency = self.next_frequency(log_best_frequency, new_frequency)
 
         frequency = int(self.max_frequency)
         self.log("optimization start")
@@ -80,7 +140,7 @@ class FrequencyExplorer:
                 if new_frequency is None:
                     self.log(f"{BEST_FREQUENCY_KEYWORD}{frequency}")
                     return frequency
-                new_frequency = math.floor((1 - self.extra_decrease) * new_frequency)
+                new_frequency = self.next_frequency(frequency, new_frequency)
             except Exception:
                 print(traceback.format_exc())
                 new_frequency = math.floor((1 - self.on_failure_decrease) * frequency)
@@ -101,12 +161,11 @@ class OptimizableConfiguration(ABC):
 
     def optimized_project(self) -> MicroBlossomAxi4Builder:
         frequency_log_dir = self.frequency_log_dir()
-        if not os.path.exists(frequency_log_dir):
-            os.mkdir(frequency_log_dir)
+        os.makedirs(frequency_log_dir, exist_ok=True)
 
         def compute_next_maximum_frequency(frequency: int) -> int | None:
             project = self.get_project(frequency=frequency)
-            project.build()
+            project.build_for_timing()
             return project.next_maximum_frequency()
 
         explorer = FrequencyExplorer(
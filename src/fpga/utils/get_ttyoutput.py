@@ -1,5 +1,6 @@
 import argparse
 import os
+import re
 import sys
 import time
 import subprocess
@@ -8,6 +9,25 @@ import subprocess
 script_dir = os.path.dirname(os.path.abspath(__file__))
 default_ttyfile = os.path.join(script_dir, "ttymicroblossom")
 
+# all the tokens of interest are matched by a single pattern compiled once, so the output is scanned only once
+HELLO_WORLD_TOKEN = "Hello world!"
+FAILURE_TOKENS = {"panicked", "Assertion failed", "assertion failed"}
+tty_token_pattern = re.compile(
+    "|".join(re.escape(token) for token in [HELLO_WORLD_TOKEN, *FAILURE_TOKENS])
+)
+
+
+def scan_ttyoutput(tty_output: str) -> set[str]:
+    return set(tty_token_pattern.findall(tty_output))
+
+
+def assert_hello_world(tty_output: str):
+    tokens = scan_ttyoutput(tty_output)
+    assert HELLO_WORLD_TOKEN in tokens, "hello world not found in tty output"
+    assert not (
+        tokens & FAILURE_TOKENS
+    ), f"failure in tty output: {tokens & FAILURE_TOKENS}"
+
 
 def get_ttyoutput(
     filename=default_ttyfile,
@@ -0,0 +1,72 @@
+"""
+Forward the outputs of many concurrent subprocesses to their log files from a single thread
+"""
+
+import os
+import selectors
+import signal
+import subprocess
+
+
+class LogMultiplexer:
+    def __init__(self) -> None:
+        self.selector = selectors.DefaultSelector()
+
+    def running(self) -> int:
+        return len(self.selector.get_map())
+
+    def spawn(
+        self, command: list[str], log_file_path: str, **kwargs
+    ) -> subprocess.Popen:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            # its own process group, so that `terminate_all` also reaches the grandchildren (e.g. Vivado)
+            start_new_session=True,
+            **kwargs,
+        )
+        os.set_blocking(process.stdout.fileno(), False)
+        log_fd = os.open(log_file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.selector.register(process.stdout, selectors.EVENT_READ, (process, log_fd))
+        return process
+
+    # forward all the available outputs and return the processes that have finished
+    def poll(self, timeout: float | None = None) -> list[subprocess.Popen]:
+        finished = []
+        for key, _ in self.selector.select(timeout):
+            process, log_fd = key.data
+            chunks = []
+            eof = False
+            while True:
+                try:
+                    chunk = os.read(key.fd, 1 << 16)
+                except BlockingIOError:
+                    break
+                if chunk == b"":
+                    eof = True
+                    break
+                chunks.append(chunk)
+            if len(chunks) > 0:
+                os.writev(log_fd, chunks)
+            if eof:
+                self.selector.unregister(key.fileobj)
+                key.fileobj.close()
+                os.close(log_fd)
+                process.wait()
+                finished.append(process)
+        return finished
+
+    # stop all the running processes and their children, e.g. after another process failed
+    def terminate_all(self):
+        for key in list(self.selector.get_map().values()):
+            process, log_fd = key.data
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            process.wait()
+            self.selector.unregister(key.fileobj)
+            key.fileobj.close()
+            os.close(log_fd)
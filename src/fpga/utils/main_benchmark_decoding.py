@@ -265,8 +265,7 @@ class DecodingSpeedBenchmarkerBasic:
     def tty_result_path(self) -> str:
         graph_builder = self.get_graph_builder()
         tty_result_path = os.path.join(self.this_dir, "tmp-tty")
-        if not os.path.exists(tty_result_path):
-            os.mkdir(tty_result_path)
+        os.makedirs(tty_result_path, exist_ok=True)
         return os.path.join(
             tty_result_path, f"{graph_builder.name + self.name_suffix}.txt"
         )
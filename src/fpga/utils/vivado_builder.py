@@ -1,15 +1,276 @@
-import os, sys, git, subprocess, math
+import os, sys, subprocess, math, re, tempfile, json, glob, shutil, hashlib
+import threading, fcntl, asyncio, functools, shelve
+import logging, logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import numpy as np
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, astuple, asdict
 
-git_root_dir = git.Repo(".", search_parent_directories=True).working_tree_dir
-sys.path.insert(0, os.path.join(git_root_dir, "benchmark"))
-sys.path.insert(0, os.path.join(git_root_dir, "src", "fpga", "utils"))
+# micro_util resolves `git_root_dir`; only locate it relative to this file
+utils_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(utils_dir, "..", "..", "..", "benchmark"))
+sys.path.insert(0, utils_dir)
 from micro_util import *
 from get_ttyoutput import get_ttyoutput
 from build_micro_blossom import *
-from vivado_project import VivadoProject
+from vivado_project import VivadoProject, RoutedTimingSummary
+
+# at most this number of Vivado builds run concurrently on this machine, each using `launch_runs -jobs 3`
+VIVADO_CONCURRENT_BUILDS = max(1, (os.cpu_count() or 1) // 8)
+
+# routed checkpoints of previous builds are kept here and reused by incremental implementation
+VIVADO_CACHE_ENV = "MB_VIVADO_CACHE"
+
+# routed timing summaries of all the designs ever built in a project folder, keyed by the design hash;
+# opt-in with MB_TIMING_DB=1, and delete the file after changing the generator or the Vivado flow
+TIMING_DB_ENV = "MB_TIMING_DB"
+TIMING_DB_NAME = "timing.shelf"
+
+# designs of this code distance or larger synthesize the IP out-of-context, where the IP synthesis itself dominates
+OOC_MIN_DISTANCE = 15
+
+# a pool of build tokens shared by all builders in this process and its children (including forked workers);
+# it is only used on the Python side: make 4.3 (Ubuntu 22.04) rejects `--jobserver-auth=fifo:` in MAKEFLAGS
+_jobserver_fd: int | None = None
+
+
+def _jobserver_setup(jobs: int) -> None:
+    """create a FIFO holding `jobs` tokens (or join the one of a parent make 4.4+ in MAKEFLAGS)"""
+    global _jobserver_fd
+    if _jobserver_fd is not None:
+        return
+    match = re.search(r"--jobserver-auth=fifo:(\S+)", os.environ.get("MAKEFLAGS", ""))
+    if match is not None:
+        # already running under a jobserver, e.g. launched by `make -j`
+        _jobserver_fd = os.open(match.group(1), os.O_RDWR)
+        return
+    fifo_dir = tempfile.mkdtemp(prefix="micro_blossom_")
+    fifo_path = os.path.join(fifo_dir, "jobserver")
+    os.mkfifo(fifo_path)
+    # open read-write so that neither end ever blocks on open or sees EOF
+    _jobserver_fd = os.open(fifo_path, os.O_RDWR)
+    os.write(_jobserver_fd, b"+" * jobs)
+    # the open descriptor keeps the FIFO usable, also in forked workers
+    shutil.rmtree(fifo_dir)
+
+
+@contextmanager
+def _jobserver_token(jobs: int):
+    _jobserver_setup(jobs)
+    token = os.read(_jobserver_fd, 1)  # blocks until another build finishes
+    try:
+        yield
+    finally:
+        os.write(_jobserver_fd, token)
+
+
+@contextmanager
+def build_lock(path: str):
+    """exclusive lock on `path` across processes, held on a sidecar `.lock` file"""
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def save_directory(src: str, dst: str):
+    """copy a directory then rename it, so that concurrent readers never see a partial copy"""
+    if os.path.exists(dst):
+        return
+    tmp_dst = f"{dst}.{os.getpid()}.tmp"
+    shutil.copytree(src, tmp_dst)
+    try:
+        os.rename(tmp_dst, dst)
+    except OSError:  # saved by another process in the meantime
+        shutil.rmtree(tmp_dst)
+
+
+def _listdir_set(path: str) -> set[str] | None:
+    try:
+        return {entry.name for entry in os.scandir(path)}
+    except FileNotFoundError:
+        return None
+
+
+# files that are written once and then read by several tools are staged in memory when there is enough space;
+# staged files are named `mb_<pid>_...`, so that the ones left behind by killed processes can be swept
+SHM_DIR = "/dev/shm"
+SHM_STAGED_PATTERN = re.compile(r"mb_(\d+)_")
+# only stage when the free space is at least this many times the expected file size
+SHM_FREE_SPACE_FACTOR = 2
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # owned by another user
+        return True
+    return True
+
+
+@functools.cache
+def sweep_stale_staged_files():
+    """remove the files staged by processes that no longer exist, once per process"""
+    for entry in _listdir_set(SHM_DIR) or set():
+        match = SHM_STAGED_PATTERN.match(entry)
+        if match is None or _pid_alive(int(match.group(1))):
+            continue
+        try:
+            os.remove(os.path.join(SHM_DIR, entry))
+        except OSError:  # swept by another process, or not ours
+            pass
+
+
+@contextmanager
+def staged_in_memory(file_path: str, expected_size: int):
+    """yield a path to write `file_path` to, which atomically replaces `file_path` when the block succeeds"""
+    # next to `file_path` so that it can be renamed over it; a crash never leaves a truncated `file_path`
+    tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+    staged_file_path = tmp_file_path
+    if os.path.isdir(SHM_DIR):
+        sweep_stale_staged_files()
+        stat = os.statvfs(SHM_DIR)
+        if stat.f_bavail * stat.f_frsize >= SHM_FREE_SPACE_FACTOR * expected_size:
+            key = hashlib.blake2b(
+                os.path.abspath(file_path).encode("utf8"), digest_size=8
+            ).hexdigest()
+            staged_file_path = os.path.join(
+                SHM_DIR, f"mb_{os.getpid()}_{key}_{os.path.basename(file_path)}"
+            )
+    try:
+        yield staged_file_path
+    except BaseException:
+        if os.path.exists(staged_file_path):
+            os.remove(staged_file_path)
+        raise
+    if staged_file_path != tmp_file_path:
+        shutil.move(staged_file_path, tmp_file_path)
+    os.replace(tmp_file_path, file_path)
+
+
+# hint the kernel to read ahead the whole file, which is then read sequentially by other processes
+def advise_sequential_read(file_path: str):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+# opt-in with MB_GRAPH_CACHE=<dir>: generated graphs are then shared by all builders of the same parameters,
+# regardless of the folder and name, which means they also share the same random syndrome samples;
+# bump the version whenever the generated files change for the same parameters
+GRAPH_CACHE_VERSION = "1"
+GRAPH_CACHE_ENV = "MB_GRAPH_CACHE"
+
+
+def graph_cache_dir() -> str | None:
+    cache_dir = os.environ.get(GRAPH_CACHE_ENV, "")
+    if cache_dir == "":
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def link_or_copy(src: str, dst: str):
+    """replace `dst` with a hard link to `src` (or a copy across file systems) atomically"""
+    tmp_dst = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp_dst)
+    except OSError:
+        shutil.copy2(src, tmp_dst)
+    os.replace(tmp_dst, dst)
+
+
+def save_checkpoint(pattern: str, cached_dcp: str):
+    dcps = glob.glob(pattern)
+    if len(dcps) != 1:
+        print(f"[warning] cannot find a unique checkpoint {pattern} to cache")
+        return
+    # copy then rename so that concurrent builds never read a partial checkpoint
+    tmp_dcp = f"{cached_dcp}.{os.getpid()}.tmp"
+    shutil.copy(dcps[0], tmp_dcp)
+    os.replace(tmp_dcp, cached_dcp)
+
+
+# Vivado prints hundreds of MB for large designs, mostly IP information; only the tail is kept in `build.log`
+BUILD_LOG_MAX_BYTES = 32 << 20
+BUILD_LOG_BACKUP_COUNT = 2
+# these lines are also copied to `build.errors.log`, which is never rotated
+BUILD_LOG_NOTABLE = re.compile(r"ERROR|CRITICAL WARNING|Timing")
+
+
+def forward_build_log(stream, log_file_path: str):
+    """copy the lines of `stream` into the rotating `log_file_path` until EOF"""
+    handler = logging.handlers.RotatingFileHandler(
+        log_file_path,
+        maxBytes=BUILD_LOG_MAX_BYTES,
+        backupCount=BUILD_LOG_BACKUP_COUNT,
+        encoding="utf8",
+    )
+    handler.terminator = ""  # the lines keep their own newlines
+    errors_file_path = os.path.splitext(log_file_path)[0] + ".errors.log"
+    try:
+        with open(errors_file_path, "a", encoding="utf8") as errors_log:
+            for line in stream:
+                handler.emit(logging.makeLogRecord({"msg": line}))
+                if BUILD_LOG_NOTABLE.search(line):
+                    errors_log.write(line)
+    finally:
+        handler.close()
+
+
+def memoized_command(command_function, maxsize: int = 128):
+    """memoize a pure command builder; each call still gets its own list because the callers extend it"""
+    cached = functools.lru_cache(maxsize=maxsize)(
+        lambda *args, **kwargs: tuple(command_function(*args, **kwargs))
+    )
+
+    @functools.wraps(command_function)
+    def wrapper(*args, **kwargs) -> list[str]:
+        return list(cached(*args, **kwargs))
+
+    return wrapper
+
+
+# the executables are looked up in fixed folders, the generate command only depends on its arguments
+micro_blossom_command = memoized_command(micro_blossom_command, maxsize=1)
+fusion_blossom_command = memoized_command(fusion_blossom_command, maxsize=1)
+fusion_blossom_qecp_generate_command = memoized_command(
+    fusion_blossom_qecp_generate_command
+)
+
+
+# serialized once per distinct config; kept out of the builders, which are cloned with `Cls(**obj.__dict__)`
+@functools.lru_cache(maxsize=None)
+def compact_json(items: tuple) -> str:
+    return json.dumps(dict(items), separators=(",", ":"))
+
+
+# graphs built by this process, so that builders of the same configuration never run QEC-Playground twice
+_graph_build_locks: dict[tuple, threading.Lock] = {}
+_graph_build_locks_guard = threading.Lock()
+_graph_built: set[tuple] = set()
+# digests of the graph json files read by this process, keyed by (path, mtime), so a graph is hashed again only
+# when it is regenerated
+_graph_digests: dict[tuple[str, int], bytes] = {}
+
+
+def graph_digest(graph_file_path: str) -> bytes:
+    key = (os.path.abspath(graph_file_path), os.stat(graph_file_path).st_mtime_ns)
+    if key not in _graph_digests:
+        with open(graph_file_path, "rb") as f:
+            _graph_digests[key] = hashlib.blake2b(f.read(), digest_size=16).digest()
+    return _graph_digests[key]
 
 
 @dataclass
@@ -41,12 +302,22 @@ class MicroBlossomGraphBuilder:
     def graph_file_path(self) -> str:
         return os.path.join(self.graph_folder, f"{self.name}.json")
 
+    # packed copy of the graph json, preferred by `SingleGraph.from_file`
+    def binary_graph_file_path(self) -> str:
+        return SingleGraph.binary_file_path(self.graph_file_path())
+
     def syndrome_file_path(self) -> str:
         return os.path.join(self.graph_folder, f"{self.name}.syndromes")
 
     def defect_file_path(self) -> str:
         return os.path.join(self.graph_folder, f"{self.name}.defects")
 
+    # a generous estimate: the decoding graph (a few hundred bytes per vertex), then one line of defects per sample
+    def estimated_syndrome_file_size(self) -> int:
+        vertex_num = (self.d + 1) * (self.d + 1) * (self.noisy_measurements + 1)
+        defect_num = 1 + vertex_num * min(1.0, 20 * self.p)
+        return int(vertex_num * 512 + self.test_syndrome_count * defect_num * 8)
+
     # sanity check: assert that the file indeed contains these many samples
     def assert_defects_file_samples(self, N: int) -> int:
         defect_file_path = self.defect_file_path()
@@ -60,9 +331,74 @@ class MicroBlossomGraphBuilder:
                 sample_count >= N
             ), "this may due to incomplete sample generation, consider delete all and retry"
 
+    # MB_VISUALIZE_GRAPH=0 skips the visualization of all graphs (e.g. in large sweeps), =1 visualizes all of them
+    def should_visualize(self) -> bool:
+        value = os.environ.get("MB_VISUALIZE_GRAPH", "")
+        if value == "":
+            return self.visualize_graph
+        return value != "0"
+
+    # QEC-Playground runs one configuration per invocation, so at least let each run use all the cores that
+    # this process may use (`nproc`); `--parallel 0` would count all cores of the machine regardless of affinity
+    def qecp_threads(self) -> int:
+        return slurm_threads_or(len(os.sched_getaffinity(0)))
+
+    # includes the output folder and name, because builders of different names write to different files
+    def build_key(self) -> tuple:
+        return astuple(self)
+
+    def cache_key(self) -> str:
+        config = asdict(self)
+        for key in ["graph_folder", "name", "visualize_graph"]:
+            del config[key]
+        config["version"] = GRAPH_CACHE_VERSION
+        return hashlib.blake2b(
+            json.dumps(config, sort_keys=True).encode("utf8"), digest_size=16
+        ).hexdigest()
+
+    # (cached file, file in the graph folder); the graph json is the last one because it marks a finished build;
+    # empty when the graph cache is disabled
+    def cached_files(self) -> list[tuple[str, str]]:
+        cache_dir = graph_cache_dir()
+        if cache_dir is None:
+            return []
+        prefix = os.path.join(cache_dir, self.cache_key())
+        return [
+            (prefix + ".syndromes", self.syndrome_file_path()),
+            (prefix + ".defects", self.defect_file_path()),
+            (prefix + ".bin", self.binary_graph_file_path()),
+            (prefix + ".json", self.graph_file_path()),
+        ]
+
+    def link_from_cache(self) -> bool:
+        cached_files = self.cached_files()
+        if not cached_files:
+            return False
+        with build_lock(cached_files[-1][0]):
+            if not all(os.path.exists(cached) for cached, _ in cached_files):
+                return False
+            for cached, file_path in cached_files:
+                link_or_copy(cached, file_path)
+        return True
+
+    def save_to_cache(self):
+        cached_files = self.cached_files()
+        if not cached_files:
+            return
+        with build_lock(cached_files[-1][0]):
+            for cached, file_path in cached_files:
+                link_or_copy(file_path, cached)
+
     def clear(self, clear_defect: bool = False):
+        _graph_built.discard(self.build_key())
+        # a cleared graph is regenerated with new random samples instead of taken from the cache
+        for cached, _ in self.cached_files():
+            if os.path.exists(cached):
+                os.remove(cached)
         if os.path.exists(self.graph_file_path()):
             os.remove(self.graph_file_path())
+        if os.path.exists(self.binary_graph_file_path()):
+            os.remove(self.binary_graph_file_path())
         if os.path.exists(self.syndrome_file_path()):
             os.remove(self.syndrome_file_path())
         if clear_defect and os.path.exists(self.defect_file_path()):
@@ -81,78 +417,133 @@ class MicroBlossomGraphBuilder:
         return command
 
     def build(self) -> None:
+        key = self.build_key()
+        with _graph_build_locks_guard:
+            lock = _graph_build_locks.setdefault(key, threading.Lock())
+        # concurrent callers of the same configuration wait for the first one to finish
+        with lock:
+            if key in _graph_built:
+                return
+            os.makedirs(self.graph_folder, exist_ok=True)
+            # other processes building the same graph block here, then `_build` sees the finished files
+            with build_lock(self.graph_file_path()):
+                self._build()
+            _graph_built.add(key)
+
+    def _build(self) -> None:
+        # a single directory listing instead of checking the files one by one
+        entries = _listdir_set(self.graph_folder) or set()
         graph_file_path = self.graph_file_path()
-        if os.path.exists(graph_file_path):
+        if os.path.basename(graph_file_path) in entries:
+            return
+        if self.link_from_cache():
             return
 
-        if not os.path.exists(self.graph_folder):
-            os.mkdir(self.graph_folder)
-
-        # first create the syndrome file
+        # the graph json marks a finished build, so it is renamed into place only after all the other outputs
+        tmp_graph_file_path = f"{graph_file_path}.{os.getpid()}.tmp"
         syndrome_file_path = self.syndrome_file_path()
-        if not os.path.exists(syndrome_file_path):
-            command = self.get_simulation_command()
-            command += [
-                "--decoder",
-                "fusion",
-                "--decoder-config",
-                json.dumps(self.decoder_config(), separators=(",", ":")),
-            ]
-            command += [
-                "--debug-print",
-                "fusion-blossom-syndrome-file",
-                "--fusion-blossom-syndrome-export-filename",
-                syndrome_file_path,
-            ]
-            command += ["--parallel", f"0"]  # use all cores
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
-            assert returncode == 0, "command fails..."
-
-            # merge two side of the virtual vertices to reduce resource usage
-            if self.transform_graph:
-                if self.code_type == "rotated-planar-code":
-                    command = micro_blossom_command() + [
-                        "transform-syndromes",
-                        syndrome_file_path,
-                        syndrome_file_path,
-                        "qecp-rotated-planar-code",
-                        f"{self.d}",
-                    ]
-                    stdout, returncode = run_command_get_stdout(command)
-                    print("\n" + stdout)
-                    assert returncode == 0, "command fails..."
-                else:
-                    raise Exception(f"transform not implemented for ${self.code_type}")
-
-            if self.visualize_graph:
-                command = fusion_blossom_command() + [
+        try:
+            if os.path.basename(syndrome_file_path) in entries:
+                advise_sequential_read(syndrome_file_path)
+                asyncio.run(
+                    self.parse_syndromes(syndrome_file_path, tmp_graph_file_path)
+                )
+            else:
+                # the syndrome file is read again by the transform, the visualizer and the parser
+                with staged_in_memory(
+                    syndrome_file_path, self.estimated_syndrome_file_size()
+                ) as staged_file_path:
+                    self.generate_syndromes(staged_file_path)
+                    asyncio.run(
+                        self.parse_syndromes(
+                            staged_file_path,
+                            tmp_graph_file_path,
+                            visualize=self.should_visualize(),
+                        )
+                    )
+        except BaseException:
+            if os.path.exists(tmp_graph_file_path):
+                os.remove(tmp_graph_file_path)
+            raise
+        os.replace(tmp_graph_file_path, graph_file_path)
+        self.save_to_cache()
+
+    def generate_syndromes(self, syndrome_file_path: str) -> None:
+        command = self.get_simulation_command()
+        # QEC-Playground only takes the config inline (no config file option), well below ARG_MAX anyway
+        command += [
+            "--decoder",
+            "fusion",
+            "--decoder-config",
+            compact_json(tuple(self.decoder_config().items())),
+        ]
+        command += [
+            "--debug-print",
+            "fusion-blossom-syndrome-file",
+            "--fusion-blossom-syndrome-export-filename",
+            syndrome_file_path,
+        ]
+        command += ["--parallel", f"{self.qecp_threads()}"]
+        print(command)
+        _, returncode = run_command_stream(command)
+        assert returncode == 0, "command fails..."
+
+        # merge two side of the virtual vertices to reduce resource usage
+        if self.transform_graph:
+            if self.code_type == "rotated-planar-code":
+                command = micro_blossom_command() + [
+                    "transform-syndromes",
+                    syndrome_file_path,
+                    syndrome_file_path,
+                    "qecp-rotated-planar-code",
+                    f"{self.d}",
+                ]
+                _, returncode = run_command_stream(command)
+                assert returncode == 0, "command fails..."
+            else:
+                raise Exception(f"transform not implemented for ${self.code_type}")
+
+    # generate the graph json and the defects file from the syndrome file;
+    # the visualizer only reads the syndrome file as well, so it runs concurrently with the parser
+    async def parse_syndromes(
+        self, syndrome_file_path: str, graph_file_path: str, visualize: bool = False
+    ) -> None:
+        # the outputs may be hard links into the cache, never overwrite them in place
+        for file_path in [self.defect_file_path(), self.binary_graph_file_path()]:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        command = micro_blossom_command() + ["parser"]
+        command += [syndrome_file_path]
+        command += ["--graph-file", graph_file_path]
+        command += ["--defects-file", self.defect_file_path()]
+        # at the end of the file, transform the graph that is automatically generated
+        if self.transform_graph:
+            if self.code_type == "rotated-planar-code":
+                command += ["qecp-rotated-planar-code", f"{self.d}"]
+            else:
+                raise Exception(f"transform not implemented for ${self.code_type}")
+        print(command)
+        commands = [command]
+        if visualize:
+            commands.append(
+                fusion_blossom_command()
+                + [
                     "visualize-syndromes",
                     syndrome_file_path,
                     "--visualizer-filename",
                     f"micro_blossom_{self.name}.json",
                 ]
-                stdout, returncode = run_command_get_stdout(command)
-                print("\n" + stdout)
-                assert returncode == 0, "command fails..."
-
-        # then generate the graph json
-        if not os.path.exists(graph_file_path):
-            command = micro_blossom_command() + ["parser"]
-            command += [syndrome_file_path]
-            command += ["--graph-file", graph_file_path]
-            command += ["--defects-file", self.defect_file_path()]
-            # at the end of the file, transform the graph that is automatically generated
-            if self.transform_graph:
-                if self.code_type == "rotated-planar-code":
-                    command += ["qecp-rotated-planar-code", f"{self.d}"]
-                else:
-                    raise Exception(f"transform not implemented for ${self.code_type}")
-            print(command)
-            stdout, returncode = run_command_get_stdout(command)
-            print("\n" + stdout)
+            )
+        results = await asyncio.gather(
+            *[run_command_stream_async(command) for command in commands]
+        )
+        for _, returncode in results:
             assert returncode == 0, "command fails..."
+        SingleGraph.from_file(graph_file_path).save_binary(
+            self.binary_graph_file_path()
+        )
 
 
 @dataclass
@@ -174,6 +565,10 @@ class MicroBlossomAxi4Builder:
     support_load_stall_emulator: bool = False
     # e.g. ["offload"], ["offload", "update3"]
     inject_registers: list[str] | str = field(default_factory=lambda: [])
+    # `launch_runs -jobs` of synthesis and implementation; more jobs may cause segmentation fault
+    vivado_jobs: int = 3
+    # synthesize the IP out-of-context instead of globally, always the case for large code distances
+    ooc: bool = False
 
     # not none after
     project_builder: MicroBlossomProjectBuilder | None = None
@@ -181,6 +576,43 @@ class MicroBlossomAxi4Builder:
     def hardware_proj_dir(self) -> str:
         return os.path.join(self.project_folder, self.name)
 
+    def inject_register_list(self) -> list[str]:
+        if isinstance(self.inject_registers, str):
+            return [e for e in self.inject_registers.split(",") if e != ""]
+        return self.inject_registers
+
+    # identifies the design regardless of the project name, used as the key of the checkpoint cache
+    def _design_hash(self) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(graph_digest(self.graph_builder.graph_file_path()))
+        config = {
+            "clock_frequency": self.clock_frequency,
+            "clock_divide_by": self.clock_divide_by,
+            "broadcast_delay": self.broadcast_delay,
+            "convergecast_delay": self.convergecast_delay,
+            "context_depth": self.context_depth,
+            "hard_code_weights": self.hard_code_weights,
+            "support_add_defect_vertex": self.support_add_defect_vertex,
+            "support_offloading": self.support_offloading,
+            "support_layer_fusion": self.support_layer_fusion,
+            "support_load_stall_emulator": self.support_load_stall_emulator,
+            "inject_registers": self.inject_register_list(),
+            # an out-of-context build is routed differently from a global one of the same RTL
+            "ooc": self.ooc_synthesis(),
+        }
+        hasher.update(json.dumps(config, sort_keys=True).encode("utf8"))
+        return hasher.hexdigest()
+
+    def ooc_synthesis(self) -> bool:
+        return self.ooc or self.graph_builder.d >= OOC_MIN_DISTANCE
+
+    def vivado_cache_dir(self) -> str | None:
+        cache_dir = os.environ.get(VIVADO_CACHE_ENV, "")
+        if cache_dir == "":
+            return None
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
     def prepare_graph(self):
         self.graph_builder.build()
 
@@ -188,21 +620,45 @@ class MicroBlossomAxi4Builder:
     def create_vivado_project(self, update=False):
         # vitis panic when containing upper letter
         assert self.name.lower() == self.name
-        if not os.path.exists(self.project_folder):
-            os.mkdir(self.project_folder)
-        run_for_files = [
-            self.hardware_proj_dir(),
-            os.path.join(
-                self.hardware_proj_dir(), f"{self.name}_verilog", "MicroBlossomBus.v"
-            ),
-        ]
-        run = any([not os.path.exists(filename) for filename in run_for_files])
+        os.makedirs(self.project_folder, exist_ok=True)
+        # the verilog file only exists inside an existing project folder, checking it alone suffices
+        verilog_file = os.path.join(
+            self.hardware_proj_dir(), f"{self.name}_verilog", "MicroBlossomBus.v"
+        )
+        generator_parameters = self.generator_parameters()
         parameters = ["--name", self.name]
         parameters += ["--path", self.project_folder]
         parameters += ["--clock-frequency", f"{self.clock_frequency}"]
-        parameters += ["--clock-divide-by", f"{self.clock_divide_by}"]
         parameters += ["--graph", self.graph_builder.graph_file_path()]
-        parameters += ["--broadcast-delay", f"{self.broadcast_delay}"]
+        parameters += generator_parameters
+        if self.overwrite:
+            parameters += ["--overwrite"]
+        cached_verilog = self.cached_verilog_dir()
+        # another process creating the same project blocks here, then sees the generated verilog
+        with build_lock(self.hardware_proj_dir()):
+            run = not os.path.exists(verilog_file)
+            if run and cached_verilog is not None and os.path.exists(cached_verilog):
+                print(f"using cached verilog {cached_verilog}")
+                shutil.copytree(
+                    cached_verilog, os.path.dirname(verilog_file), dirs_exist_ok=True
+                )
+                run = False
+            self.project_builder = MicroBlossomProjectBuilder.from_args(
+                parameters, run=run, update=update
+            )
+            if run and cached_verilog is not None:
+                save_directory(os.path.dirname(verilog_file), cached_verilog)
+
+    # the generated verilog does not depend on the name, path and clock frequency of the project
+    def generator_parameters(self) -> list[str]:
+        return ["--clock-divide-by", f"{self.clock_divide_by}"] + list(
+            self._base_parameters
+        )
+
+    # the feature flags are fixed once the builder is constructed, assembled only once
+    @functools.cached_property
+    def _base_parameters(self) -> tuple[str, ...]:
+        parameters = ["--broadcast-delay", f"{self.broadcast_delay}"]
         parameters += ["--convergecast-delay", f"{self.convergecast_delay}"]
         parameters += ["--context-depth", f"{self.context_depth}"]
         if not self.hard_code_weights:
@@ -215,60 +671,161 @@ class MicroBlossomAxi4Builder:
             parameters += ["--support-layer-fusion"]
         if self.support_load_stall_emulator:
             parameters += ["--support-load-stall-emulator"]
-        inject_registers = self.inject_registers
-        if isinstance(inject_registers, str):
-            inject_registers = [e for e in self.inject_registers.split(",") if e != ""]
-        parameters += ["--inject-registers"] + inject_registers
-        if self.overwrite:
-            parameters += ["--overwrite"]
-        self.project_builder = MicroBlossomProjectBuilder.from_args(
-            parameters, run=run, update=update
-        )
+        parameters += ["--inject-registers"] + self.inject_register_list()
+        return tuple(parameters)
+
+    # identifies the RTL, i.e. everything but the clock frequency
+    def _rtl_hash(self) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(graph_digest(self.graph_builder.graph_file_path()))
+        hasher.update(json.dumps(self.generator_parameters()).encode("utf8"))
+        return hasher.hexdigest()
+
+    # the verilog is a pure function of the graph and the generator parameters, shared by all clock frequencies
+    def cached_verilog_dir(self) -> str | None:
+        cache_dir = self.vivado_cache_dir()
+        if cache_dir is None:
+            return None
+        return os.path.join(cache_dir, "verilog", self._rtl_hash())
 
     def build_rust_binary(
         self, main: str = "hello_world", make_target: str = "aarch64"
     ):
         make_env = os.environ.copy()
         make_env["EMBEDDED_BLOSSOM_MAIN"] = main
-        process = subprocess.Popen(
-            ["make", make_target],
-            universal_newlines=True,
-            stdout=sys.stdout,
-            stderr=sys.stderr,
-            cwd=embedded_dir,
-            env=make_env,
-        )
-        process.wait()
-        assert process.returncode == 0, "compile error"
+        # all builders compile into the same embedded project
+        with build_lock(embedded_dir):
+            process = subprocess.Popen(
+                ["make", make_target],
+                universal_newlines=True,
+                stdout=sys.stdout,
+                stderr=sys.stderr,
+                cwd=embedded_dir,
+                env=make_env,
+            )
+            process.wait()
+            assert process.returncode == 0, "compile error"
 
     def has_xsa(self) -> bool:
-        xsa_path = os.path.join(self.hardware_proj_dir(), f"{self.name}.xsa")
-        return os.path.exists(xsa_path)
+        return os.path.exists(self.xsa_path())
 
-    def build_vivado_project(self, force_recompile_binary: bool = False):
+    def build_vivado_project(
+        self, force_recompile_binary: bool = False, no_cache: bool = False
+    ):
         log_file_path = os.path.join(self.hardware_proj_dir(), "build.log")
         frequency = self.clock_frequency
         print(f"building frequency={frequency}, log output to {log_file_path}")
         if not self.has_xsa() or force_recompile_binary:
-            with open(log_file_path, "a") as log:
-                process = subprocess.Popen(
-                    ["make"],
-                    universal_newlines=True,
-                    stdout=log.fileno(),
-                    stderr=log.fileno(),
-                    cwd=self.hardware_proj_dir(),
+            cache_dir = None if no_cache else self.vivado_cache_dir()
+            if cache_dir is not None:
+                cached_dcp = os.path.join(cache_dir, f"{self._design_hash()}.dcp")
+                # designs differing only in the clock frequency share the same synthesized netlist
+                ooc_suffix = "_ooc" if self.ooc_synthesis() else ""
+                cached_synth_dcp = os.path.join(
+                    cache_dir, f"{self._rtl_hash()}{ooc_suffix}_synth.dcp"
+                )
+            with _jobserver_token(VIVADO_CONCURRENT_BUILDS):
+                make_env = os.environ.copy()
+                make_env["VIVADO_JOBS"] = f"{self.vivado_jobs}"
+                make_env.pop("MB_GLOBAL_SYNTH", None)
+                if not self.ooc_synthesis():
+                    make_env["MB_GLOBAL_SYNTH"] = "1"
+                if cache_dir is not None and os.path.exists(cached_dcp):
+                    print(f"using incremental checkpoint {cached_dcp}")
+                    make_env["MB_INCREMENTAL_CHECKPOINT"] = cached_dcp
+                if cache_dir is not None and os.path.exists(cached_synth_dcp):
+                    print(f"reusing synthesis checkpoint {cached_synth_dcp}")
+                    make_env["MB_REUSE_SYNTH"] = cached_synth_dcp
+                # builders of the same project never interleave their outputs in the log
+                with build_lock(log_file_path):
+                    # an absolute executable, `make -C` instead of `cwd` and `close_fds=False`
+                    # let CPython launch it with posix_spawn instead of fork+exec
+                    process = subprocess.Popen(
+                        [
+                            shutil.which("make") or "make",
+                            "-C",
+                            self.hardware_proj_dir(),
+                        ],
+                        universal_newlines=True,
+                        errors="replace",
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        env=make_env,
+                        close_fds=False,
+                    )
+                    # this thread would only wait for make anyway, so it forwards the output itself
+                    forward_build_log(process.stdout, log_file_path)
+                    process.stdout.close()
+                    process.wait()
+                    assert process.returncode == 0, "synthesis error"
+            if cache_dir is not None:
+                vivado = self.get_vivado()
+                save_checkpoint(
+                    os.path.join(vivado.impl_dir, "*_routed.dcp"), cached_dcp
+                )
+                save_checkpoint(
+                    os.path.join(vivado.synth_dir, "*.dcp"), cached_synth_dcp
                 )
-                process.wait()
-                assert process.returncode == 0, "synthesis error"
 
-    def get_vivado(self) -> VivadoProject:
+    # shared by all the queries of this builder; the builder must not be renamed or moved afterwards
+    @functools.cached_property
+    def _vivado_project(self) -> VivadoProject:
         return VivadoProject(self.hardware_proj_dir())
 
+    def get_vivado(self) -> VivadoProject:
+        return self._vivado_project
+
+    def xsa_path(self) -> str:
+        return os.path.join(self.hardware_proj_dir(), f"{self.name}.xsa")
+
+    # `VivadoProject` parses the report again only when it changes; the returned object is shared,
+    # so callers must not modify it
+    def routed_timing_summary(self) -> RoutedTimingSummary:
+        return self._vivado_project.routed_timing_summery()
+
+    def timing_db_path(self) -> str | None:
+        if os.environ.get(TIMING_DB_ENV, "") in ["", "0"]:
+            return None
+        return os.path.join(self.project_folder, TIMING_DB_NAME)
+
+    # the timing of a design survives the restart of a sweep and the removal of its project
+    def recorded_timing_summary(self) -> RoutedTimingSummary | None:
+        db_path = self.timing_db_path()
+        # the design hash includes the graph; a query never generates it
+        if db_path is None or not os.path.exists(self.graph_builder.graph_file_path()):
+            return None
+        os.makedirs(self.project_folder, exist_ok=True)
+        with build_lock(db_path), shelve.open(db_path) as timing_db:
+            return timing_db.get(self._design_hash())
+
+    def record_timing_summary(self, timing_summary: RoutedTimingSummary):
+        db_path = self.timing_db_path()
+        if db_path is None:
+            return
+        with build_lock(db_path), shelve.open(db_path) as timing_db:
+            timing_db[self._design_hash()] = timing_summary
+
+    # the timing of the built project, which is then recorded; the recorded timing only if the project is absent
+    def design_timing_summary(self) -> RoutedTimingSummary:
+        if not self.has_xsa():
+            timing_summary = self.recorded_timing_summary()
+            assert timing_summary is not None, "the project is not built"
+            return timing_summary
+        assert self.get_vivado().frequency() == self.clock_frequency
+        timing_summary = self.routed_timing_summary()
+        self.record_timing_summary(timing_summary)
+        return timing_summary
+
+    # build the project unless it is absent but its timing is recorded
+    def build_for_timing(self):
+        if self.has_xsa() or self.recorded_timing_summary() is None:
+            self.build()
+
     # check timing reports to make sure there are no negative slacks
     def timing_sanity_check_failed(self) -> bool:
         print("start timing sanity check")
         vivado = self.get_vivado()
-        wns = vivado.routed_timing_summery().clk_pl_0_wns
+        wns = self.routed_timing_summary().clk_pl_0_wns
         frequency = vivado.frequency()
         period = 1e-6 / frequency
         new_period = period - wns * 1e-9
@@ -315,10 +872,8 @@ class MicroBlossomAxi4Builder:
             return tty_output
 
     def estimate_maximum_frequency(self) -> float:
-        vivado = self.get_vivado()
-        wns = vivado.routed_timing_summery().clk_pl_0_wns
-        frequency = vivado.frequency()
-        assert frequency == self.clock_frequency
+        wns = self.design_timing_summary().clk_pl_0_wns
+        frequency = self.clock_frequency
         period = 1e-6 / frequency
         new_period = period - wns * 1e-9
         new_frequency = 1 / new_period / 1e6
@@ -327,10 +882,16 @@ class MicroBlossomAxi4Builder:
     # this function assumes the bottleneck is the fast clock domain (self.frequency)
     # return current frequency if timing passed; otherwise return a maximum frequency that is achievable
     def next_maximum_frequency(self) -> int | None:
-        vivado = self.get_vivado()
-        wns = vivado.routed_timing_summery().clk_pl_0_wns
-        frequency = vivado.frequency()
-        new_frequency = math.floor(self.estimate_maximum_frequency())
+        timing_summary = self.design_timing_summary()
+        wns = timing_summary.clk_pl_0_wns
+        frequency = self.clock_frequency
+        # exact integer arithmetic in picoseconds, so that no rounding error accumulates across iterations
+        period_ps = int(1_000_000 // frequency)
+        new_period_ps = period_ps + int(round(-wns * 1000))
+        new_frequency = 1_000_000 // new_period_ps
+        if timing_summary.clk_pl_0_whs is not None and timing_summary.clk_pl_0_whs < 0:
+            # lowering the clock frequency does not fix hold violations
+            print(f"[warning] whs: {timing_summary.clk_pl_0_whs}ns, hold time violated")
         if wns < 0:
             print(f"[failed] frequency={frequency}MHz clock frequency too high")
             print(f"wns: {wns}ns, should lower the frequency to {new_frequency}MHz")
@@ -343,10 +904,8 @@ class MicroBlossomAxi4Builder:
     # this function assumes the bottleneck is the slow clock domain (self.frequency / self.clock_divide_by)
     # return current value if timing passed; otherwise return a minimum clock_divide_by that is achievable
     def next_minimum_clock_divide_by(self) -> float:
-        vivado = self.get_vivado()
-        wns = vivado.routed_timing_summery().clk_pl_0_wns
-        frequency = vivado.frequency()
-        assert frequency == self.clock_frequency
+        wns = self.design_timing_summary().clk_pl_0_wns
+        frequency = self.clock_frequency
         if wns < 0:
             print(
                 f"frequency={frequency}MHz, clock_divide_by={self.clock_divide_by} is not achievable"
@@ -377,11 +936,31 @@ class MicroBlossomAxi4Builder:
         process.wait()
         assert process.returncode == 0, "compile error"
 
-    def build(self):
+    # set `no_cache` to ignore the checkpoint cache in $MB_VIVADO_CACHE
+    def build(self, no_cache: bool = False):
         self.prepare_graph()
         self.create_vivado_project()
         self.build_rust_binary()
-        self.build_vivado_project()
+        self.build_vivado_project(no_cache=no_cache)
+
+    @classmethod
+    def build_many(
+        cls,
+        builders: list["MicroBlossomAxi4Builder"],
+        jobs: int | None = None,
+        no_cache: bool = False,
+    ):
+        """build independent projects concurrently; at most `VIVADO_CONCURRENT_BUILDS` of them run Vivado at a time"""
+        if jobs is None:
+            jobs = VIVADO_CONCURRENT_BUILDS
+        # create the jobserver before forking so that all the workers share the same tokens
+        _jobserver_setup(VIVADO_CONCURRENT_BUILDS)
+        with ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            futures = [executor.submit(builder.build, no_cache) for builder in builders]
+            for future in futures:
+                future.result()
 
 
 class HeuristicFrequencyCircuitLevel:
@@ -9,6 +9,7 @@ import subprocess
 class RoutedTimingSummary:
     clk_pl_0_wns: float
     clk_pl_0_tns: float
+    clk_pl_0_whs: Optional[float] = None
 
     @staticmethod
     def from_file(filepath: str) -> "RoutedTimingSummary":
@@ -22,7 +23,12 @@ class RoutedTimingSummary:
         assert match2 is not None
         clk_pl_0_wns = float(match2.group(1))
         clk_pl_0_tns = float(match2.group(3))
-        return RoutedTimingSummary(clk_pl_0_wns, clk_pl_0_tns)
+        summary = RoutedTimingSummary(clk_pl_0_wns, clk_pl_0_tns)
+        # WNS TNS TNS-Failing-Endpoints TNS-Total-Endpoints WHS THS ...
+        values = re.findall(r"[-+]?(?:[0-9]*[.])?[0-9]+", match.group(1))
+        if len(values) >= 5:
+            summary.clk_pl_0_whs = float(values[4])
+        return summary
 
 
 @dataclass
@@ -157,12 +163,29 @@ class VivadoProject:
         self.name = os.path.basename(os.path.normpath(project_dir))
         self.project_dir = project_dir
         self.vivado_dir = os.path.join(project_dir, f"{self.name}_vivado")
+        self.synth_dir = os.path.join(self.vivado_dir, f"{self.name}.runs", "synth_1")
         self.impl_dir = os.path.join(self.vivado_dir, f"{self.name}.runs", "impl_1")
+        # file path -> (mtime, parsed value)
+        self.parsed_files: dict[str, tuple[int, object]] = {}
+
+    # parse the file again only when it is modified; the returned object is shared, do not modify it
+    def parse_file(self, filepath: str, parser):
+        mtime = os.stat(filepath).st_mtime_ns
+        cached = self.parsed_files.get(filepath)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        value = parser(filepath)
+        self.parsed_files[filepath] = (mtime, value)
+        return value
 
     def frequency(self) -> float:
-        with open(
-            os.path.join(self.project_dir, "Makefile"), "r", encoding="utf8"
-        ) as f:
+        return self.parse_file(
+            os.path.join(self.project_dir, "Makefile"), VivadoProject.parse_frequency
+        )
+
+    @staticmethod
+    def parse_frequency(filepath: str) -> float:
+        with open(filepath, "r", encoding="utf8") as f:
             makefile = f.read()
         match = re.search(r"CLOCK_FREQUENCY \?= (([0-9]*[.])?[0-9]+)", makefile)
         assert match is not None
@@ -184,7 +207,9 @@ class VivadoProject:
         self, force_regenerate: bool = False
     ) -> RoutedTimingSummary:
         self.report_impl(force_regenerate)
-        return RoutedTimingSummary.from_file(self.impl_timing_summary_path())
+        return self.parse_file(
+            self.impl_timing_summary_path(), RoutedTimingSummary.from_file
+        )
 
     def report_impl(self, force_regenerate: bool = False):
         filepaths = [self.impl_utilization_path(), self.impl_timing_summary_path()]